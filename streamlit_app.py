@@ -6,7 +6,7 @@
 
 import json
 import math
-import json
+import re
 from dataclasses import dataclass, asdict
 from typing import List, Dict
 
@@ -15,7 +15,6 @@ import streamlit as st
 # ---------------------------------
 # Helpers
 # ---------------------------------
-def nf(n, digits=2):
 # =============== Page setup & minimalist dark theme ===============
 st.set_page_config(page_title="Feasibility v1", page_icon="🏗️", layout="wide")
 st.markdown(
@@ -41,19 +40,20 @@ st.markdown(
 )
 
 # ====================== Helpers ======================
+# format specs for the precisions used in the UI (built once, not per call)
+_NF_SPECS = {d: f",.{d}f" for d in range(4)}
+
 def nf(num, digits=2):
-try:
-        x = float(n)
+    try:
+        x = num if isinstance(num, (int, float)) else float(num)
         if digits is None:
             return f"{int(round(x)):,}"
-        return f"{x:,.{digits}f}"
-        n = float(num)
-        return f"{n:,.{digits}f}"
-except Exception:
-return "–"
+        return format(x, _NF_SPECS.get(digits) or f",.{digits}f")
+    except Exception:
+        return "–"
 
 def clamp(v, lo, hi):
-return min(hi, max(lo, v))
+    return min(hi, max(lo, v))
 
 def create_csv(rows):
     if not rows: return ""
@@ -63,14 +63,6 @@ def create_csv(rows):
         out.append(",".join(str(r.get(h, "")) for h in headers))
     return "\n".join(out)
 
-def calc_disabled_parking(total_cars: float) -> int:
-    tc = int(math.floor(max(0.0, total_cars)))
-    if tc <= 0: return 0
-    if tc <= 50: return 2
-    if tc <= 100: return 3
-    return 3 + max(0, math.ceil((tc - 100) / 100))
-
-def compute_far_counted(mainAG, mainBG, pcAG, pcBG, paAG, paBG, countParking, countBasement):
 def create_csv_rows(d: Dict) -> str:
     if not d:
         return ""
@@ -79,31 +71,41 @@ def create_csv_rows(d: Dict) -> str:
         lines.append(f"{k},{v}")
     return "\n".join(lines)
 
+_NUM_START = frozenset("+-.0123456789")
+_NUM_RE = re.compile(r"[+-]?(?:\d+\.?\d*|\.\d+)")
+
+def _to_number_if_possible(v: str):
+    # exported bools ("True"/"False") must come back as bools, not truthy strings
+    if v[:1] in "tTfF":
+        low = v.lower()
+        if low == "true":
+            return True
+        if low == "false":
+            return False
+    # first-char gate: names/flags/lists never reach the regex or float()
+    if not v or v[0] not in _NUM_START:
+        return v
+    return float(v) if _NUM_RE.fullmatch(v) else v
+
 def parse_csv_to_dict(text: str) -> Dict:
     rows = [r for r in text.splitlines() if r.strip()]
     if not rows:
         return {}
     out = {}
     for line in rows[1:]:
-        if "," not in line:
+        k, sep, v = line.partition(",")
+        if not sep:
             continue
-        k, v = line.split(",", 1)
         k = k.strip()
-        v = v.strip()
-        try:
-            vv = float(v) if v.replace(".","",1).replace("-","",1).isdigit() else v
-        except Exception:
-            vv = v
-        out[k] = vv
+        out[k] = _to_number_if_possible(v.strip())
     return out
 
 # Disabled-parking rule (worst-case guideline)
 def calc_disabled_parking(total_cars: int) -> int:
     if total_cars <= 0: return 0
     if total_cars <= 50: return 2
-    if total_cars <= 100: return 3
-    extra_hundreds = math.ceil((total_cars - 100) / 100)
-    return 3 + max(0, extra_hundreds)
+    # 3 up to 100 cars, +1 per started hundred: integer ceil, no float division
+    return 2 + (total_cars + 99) // 100
 
 # FAR counted helper (LEGAL area):
 # - Auto parking is NEVER counted in FAR (policy)
@@ -113,16 +115,9 @@ def compute_far_counted(
     mainAG, mainBG, pcAG, pcBG, paAG, paBG,
     count_parking: bool, count_basement: bool
 ):
-far = 0.0
-    far += mainAG + (mainBG if countBasement else 0.0)
-    if countParking:
-        far += pcAG + (pcBG if countBasement else 0.0)
-        far += paAG + (paBG if countBasement else 0.0)
-    far += mainAG + (mainBG if count_basement else 0.0)
-    if count_parking:
-        far += pcAG + (pcBG if count_basement else 0.0)
-    # auto (paAG/paBG) excluded from FAR by policy
-return far
+    # bools act as 0/1 weights; auto (paAG/paBG) excluded from FAR by policy
+    bg = bool(count_basement)
+    return mainAG + bg * mainBG + bool(count_parking) * (pcAG + bg * pcBG)
 
 # ---- Legal parking (TH) ----
 def legal_parking_th(location: str, units: list, gfa: float):
@@ -183,6 +178,7 @@ def green_th(units: list, site_area: float, green_on_ground: float, green_on_str
 # Defaults & state
 # ---------------------------------
 RULES = {"base": {"farRange": (1.0, 10.0)}}
+FAR_MIN, FAR_MAX = RULES["base"]["farRange"]
 
 DEFAULT = dict(
     name="Scenario A",
@@ -284,12 +280,17 @@ DEFAULT = {
 }
 
 def ensure_defaults(s: dict) -> dict:
-    out = dict(s)
-    for k, v in DEFAULT.items():
-        if k not in out:
-            out[k] = float(v) if isinstance(v, (int, float)) else v
+    # one merge: defaults first, scenario values win
+    out = {**DEFAULT, **s}
+    # never share the mutable cost list with DEFAULT (or the caller)
+    if isinstance(out.get("customCosts"), list):
+        out["customCosts"] = list(out["customCosts"])
     return out
 BUILDING_TYPES = ["Housing", "Hi-Rise", "Low-Rise", "Public Building", "Office Building", "Hotel"]
+BUILDING_TYPE_INDEX = {bt: i for i, bt in enumerate(BUILDING_TYPES)}
+LOCATIONS = ("BKK", "OUTSIDE")
+YES_NO = ("Yes", "No")
+NO_YES = ("No", "Yes")
 RULES = {
     "Housing": {"minOSR": 30, "greenPctOfOSR": None},
     "Hi-Rise": {"minOSR": 10, "greenPctOfOSR": 50},
@@ -303,11 +304,14 @@ RULES = {
 # Page chrome
 # ---------------------------------
 st.set_page_config(page_title="Feasibility (TH) — Streamlit", layout="wide")
-def suggested_osr(bt): 
-    return RULES.get(bt, {}).get("minOSR", 15)
+# per-type suggestions resolved once from RULES
+_SUGGESTED_OSR = {bt: r.get("minOSR", 15) for bt, r in RULES.items()}
+_SUGGESTED_GREEN = {bt: (40 if r.get("greenPctOfOSR") is None else r["greenPctOfOSR"]) for bt, r in RULES.items()}
+
+def suggested_osr(bt):
+    return _SUGGESTED_OSR.get(bt, 15)
 def suggested_green(bt):
-    g = RULES.get(bt, {}).get("greenPctOfOSR")
-    return 40 if g is None else g
+    return _SUGGESTED_GREEN.get(bt, 40)
 
 # ====================== Sidebar (Import/Export) ======================
 with st.sidebar:
@@ -320,11 +324,11 @@ with st.sidebar:
         mime="text/csv",
     )
     up = st.file_uploader("⬆️ Import CSV", type=["csv"], accept_multiple_files=False)
-    scenario = DEFAULT.copy()
+    scenario = ensure_defaults({})
     if up is not None:
         try:
             parsed = parse_csv_to_dict(up.read().decode("utf-8"))
-            scenario.update(parsed)
+            scenario = ensure_defaults(parsed)
             st.success("Imported.")
         except Exception as e:
             st.error(f"Import failed: {e}")
@@ -377,8 +381,8 @@ c1, c2, c3 = st.columns(3)
 with c1:
     st.markdown("#### Site & FAR")
     s["siteArea"] = st.number_input("Site Area (m²)", min_value=0.0, value=float(s.get("siteArea", DEFAULT["siteArea"])), step=100.0)
-    s["far"]      = st.number_input("FAR (1–10)", min_value=RULES["base"]["farRange"][0], max_value=RULES["base"]["farRange"][1], value=float(s.get("far", DEFAULT["far"])), step=0.1)
-    s["location"] = st.selectbox("Location (legal)", options=["BKK", "OUTSIDE"], index=0 if s.get("location","BKK")=="BKK" else 1)
+    s["far"]      = st.number_input("FAR (1–10)", min_value=FAR_MIN, max_value=FAR_MAX, value=float(s.get("far", DEFAULT["far"])), step=0.1)
+    s["location"] = st.selectbox("Location (legal)", options=LOCATIONS, index=0 if s.get("location","BKK")=="BKK" else 1)
 
 with c2:
     st.markdown("#### Geometry & Height")
@@ -442,7 +446,7 @@ st.divider()
 # ---------------------------------
 # Derive core areas & parking supply
 # ---------------------------------
-far = clamp(s["far"], *RULES["base"]["farRange"])
+far = min(FAR_MAX, max(FAR_MIN, s["far"]))
 maxGFA = s["siteArea"] * far
 
 # CFA
@@ -471,7 +475,7 @@ with colA:
     s = scenario
     s["siteArea"] = st.number_input("Site Area (m²)", min_value=0.0, value=float(s["siteArea"]), step=100.0)
     s["far"] = st.number_input("FAR (1–10)", min_value=1.0, max_value=10.0, value=float(s["far"]), step=0.1)
-    s["bType"] = st.selectbox("Building Type", BUILDING_TYPES, index=max(0, BUILDING_TYPES.index(str(s["bType"])) if s.get("bType") in BUILDING_TYPES else 0))
+    s["bType"] = st.selectbox("Building Type", BUILDING_TYPES, index=BUILDING_TYPE_INDEX.get(s.get("bType"), 0))
     s["osr"] = st.number_input("OSR (%)", min_value=0.0, max_value=100.0, value=float(s["osr"]), step=1.0)
     s["greenPctOfOSR"] = st.number_input("Green (% of OSR)", min_value=0.0, max_value=100.0, value=float(s["greenPctOfOSR"]), step=1.0)
 
@@ -512,8 +516,8 @@ s["servicePctOfGFA"] = e4.number_input("Service (% of GFA)", min_value=0.0, max_
 
 st.subheader("FAR Rules")
 f1, f2 = st.columns(2)
-s["countParkingInFAR"]  = f1.selectbox("Count **Conventional** Parking in FAR?", ["Yes","No"], index=0 if bool(s["countParkingInFAR"]) else 1) == "Yes"
-s["countBasementInFAR"] = f2.selectbox("Count Basement in FAR?", ["No","Yes"], index=1 if bool(s["countBasementInFAR"]) else 0) == "Yes"
+s["countParkingInFAR"]  = f1.selectbox("Count **Conventional** Parking in FAR?", YES_NO, index=0 if bool(s["countParkingInFAR"]) else 1) == "Yes"
+s["countBasementInFAR"] = f2.selectbox("Count Basement in FAR?", NO_YES, index=1 if bool(s["countBasementInFAR"]) else 0) == "Yes"
 
 st.subheader("Costs & Budget (THB)")
 c1, c2, c3, c4 = st.columns(4)
@@ -551,18 +555,11 @@ totalCFA = mainCFA + parkConCFA + parkAutoCFA
 estHeight = s["ftf"] * (s["mainFloorsAG"] + s["parkingConFloorsAG"] + s["parkingAutoFloorsAG"])
 heightOk = estHeight <= s["maxHeight"]
 
-# Parking supply
-effConv  = s["bayConv"] * (1 + s["circConvPct"])
-effAuto  = s["bayAuto"] * (1 + s["circAutoPct"])
-effOpen  = s["openLotBay"] * (1 + s["openLotCircPct"])
-convCarsPerFloor = int(math.floor(s["parkingConPlate"] / max(1.0, effConv)))
-autoCarsPerFloor = int(math.floor(s["parkingAutoPlate"] / max(1.0, effAuto)))
-# parking supply
+# parking supply (reuses eff_con / eff_auto / eff_open from above)
 convCarsPerFloor = int(math.floor(s["parkingConPlate"] / max(1.0, eff_con))) if s["parkingConPlate"] > 0 else 0
 autoCarsPerFloor = int(math.floor(s["parkingAutoPlate"] / max(1.0, eff_auto))) if s["parkingAutoPlate"] > 0 else 0
 totalConvCars = convCarsPerFloor * int(s["parkingConFloorsAG"] + s["parkingConFloorsBG"])
 totalAutoCars = autoCarsPerFloor * int(s["parkingAutoFloorsAG"] + s["parkingAutoFloorsBG"])
-openLotCars   = int(math.floor(s["openLotArea"] / max(1.0, effOpen)))
 openLotCars = int(math.floor(s["openLotArea"] / max(1.0, eff_open)))
 totalCars = totalConvCars + totalAutoCars + openLotCars
 disabledCars = calc_disabled_parking(totalCars)